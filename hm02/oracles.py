@@ -49,12 +49,13 @@ class QuadraticOracle(BaseSmoothOracle):
             raise ValueError('A should be a symmetric matrix.')
         self.A = A
         self.b = b
+        self._A = A.tocsr() if scipy.sparse.issparse(A) else A
 
     def func(self, x):
-        return 0.5 * np.dot(self.A.dot(x), x) - self.b.dot(x)
+        return 0.5 * x.dot(self._A @ x) - self.b.dot(x)
 
     def grad(self, x):
-        return self.A.dot(x) - self.b
+        return self._A @ x - self.b
 
     def hess(self, x):
         return self.A 
@@ -84,23 +85,47 @@ class LogRegL2Oracle(BaseSmoothOracle):
         self.matmat_ATsA = matmat_ATsA
         self.b = b
         self.regcoef = regcoef
+        self._cache = (None, None, None)
+
+    def _margins(self, x):
+        """
+        Returns margins z = b * Ax, reusing them if x was the last point.
+        """
+        x_last, z, _ = self._cache
+        if x_last is None or not np.array_equal(x, x_last):
+            z = self.b * self.matvec_Ax(x)
+            self._cache = (np.copy(x), z, None)
+        return z
+
+    def _sigma(self, x):
+        """
+        Returns expit(b * Ax), computed on first use at the cached point.
+        """
+        z = self._margins(x)
+        x_last, _, sigma = self._cache
+        if sigma is None:
+            sigma = scipy.special.expit(z)
+            self._cache = (x_last, z, sigma)
+        return sigma
 
     def func(self, x):
-        Ax = self.matvec_Ax(x)
-        return (np.mean(np.logaddexp(0, -self.b * Ax)) + 
-                0.5 * self.regcoef * np.linalg.norm(x)**2)
+        z = self._margins(x)
+        return (np.mean(np.logaddexp(0, -z)) + 
+                0.5 * self.regcoef * x.dot(x))
 
     def grad(self, x):
-        Ax = self.matvec_Ax(x)
-        sigma = scipy.special.expit(self.b * Ax)
+        sigma = self._sigma(x)
         return (self.matvec_ATx((sigma - 1) * self.b) / len(self.b) + 
                 self.regcoef * x)
 
     def hess(self, x):
-        Ax = self.matvec_Ax(x)
-        sigma = scipy.special.expit(self.b * Ax)
+        sigma = self._sigma(x)
         S = sigma * (1 - sigma)
-        return self.matmat_ATsA(S) / len(self.b) + self.regcoef * np.eye(len(x))
+        H = self.matmat_ATsA(S) / len(self.b)
+        if scipy.sparse.issparse(H):
+            H = H.toarray()
+        H.flat[::H.shape[0] + 1] += self.regcoef
+        return H
 
 
 class LogRegL2OptimizedOracle(LogRegL2Oracle):
@@ -112,14 +137,31 @@ class LogRegL2OptimizedOracle(LogRegL2Oracle):
     """
     def __init__(self, matvec_Ax, matvec_ATx, matmat_ATsA, b, regcoef):
         super().__init__(matvec_Ax, matvec_ATx, matmat_ATsA, b, regcoef)
+        self._directional_cache = (None, None)
+
+    def _margins_directional(self, x, d):
+        """
+        Returns (b * Ax, b * Ad). b * Ax comes from the point cache,
+        b * Ad is computed once per line search direction.
+        """
+        z_x = self._margins(x)
+        d_last, z_d = self._directional_cache
+        if d_last is None or not np.array_equal(d, d_last):
+            z_d = self.b * self.matvec_Ax(d)
+            self._directional_cache = (np.copy(d), z_d)
+        return z_x, z_d
 
     def func_directional(self, x, d, alpha):
-        # TODO: Implement optimized version with pre-computation of Ax and Ad
-        return None
+        z_x, z_d = self._margins_directional(x, d)
+        x_alpha = x + alpha * d
+        return np.squeeze(np.mean(np.logaddexp(0, -(z_x + alpha * z_d))) +
+                          0.5 * self.regcoef * x_alpha.dot(x_alpha))
 
     def grad_directional(self, x, d, alpha):
-        # TODO: Implement optimized version with pre-computation of Ax and Ad
-        return None
+        z_x, z_d = self._margins_directional(x, d)
+        sigma = scipy.special.expit(z_x + alpha * z_d)
+        return np.squeeze((sigma - 1).dot(z_d) / len(self.b) +
+                          self.regcoef * (x + alpha * d).dot(d))
 
 
 def create_log_reg_oracle(A, b, regcoef, oracle_type='usual'):
@@ -128,13 +170,16 @@ def create_log_reg_oracle(A, b, regcoef, oracle_type='usual'):
         `oracle_type` must be either 'usual' or 'optimized'
     """
     if scipy.sparse.issparse(A):
-        matvec_Ax = lambda x: A.dot(x)
-        matvec_ATx = lambda x: A.T.dot(x)
-        matmat_ATsA = lambda s: A.T.dot(scipy.sparse.diags(s).dot(A))
+        A_csr = A.tocsr()
+        AT = A_csr.T.tocsr()
+        matvec_Ax = lambda x: A_csr @ x
+        matvec_ATx = lambda x: AT @ x
+        matmat_ATsA = lambda s: AT @ A_csr.multiply(s.reshape(-1, 1))
     else:
+        AT = A.T
         matvec_Ax = lambda x: A @ x
-        matvec_ATx = lambda x: A.T @ x
-        matmat_ATsA = lambda s: A.T @ (np.diag(s) @ A)
+        matvec_ATx = lambda x: AT @ x
+        matmat_ATsA = lambda s: AT @ (A * s[:, None])
 
     if oracle_type == 'usual':
         return LogRegL2Oracle(matvec_Ax, matvec_ATx, matmat_ATsA, b, regcoef)
@@ -153,12 +198,11 @@ def grad_finite_diff(func, x, eps=1e-8):
         e_i = (0, 0, ..., 0, 1, 0, ..., 0)
                           >> i <<
     """
-    grad = np.zeros_like(x)
-    for i in range(len(x)):
-        e_i = np.zeros_like(x)
-        e_i[i] = 1
-        grad[i] = (func(x + eps * e_i) - func(x)) / eps
-    return grad
+    n = len(x)
+    E = eps * np.eye(n)
+    f_x = func(x)
+    f_x_ei = np.fromiter((func(x + E[i]) for i in range(n)), dtype=float, count=n)
+    return (f_x_ei - f_x) / eps
 
 
 def hess_finite_diff(func, x, eps=1e-5):
@@ -173,16 +217,18 @@ def hess_finite_diff(func, x, eps=1e-5):
                           >> i <<
     """
     n = len(x)
-    hess = np.zeros((n, n))
-    for i in range(n):
-        for j in range(i, n):
-            e_i = np.zeros_like(x)
-            e_j = np.zeros_like(x)
-            e_i[i] = 1
-            e_j[j] = 1
-            f_x_ei_ej = func(x + eps * e_i + eps * e_j)
-            f_x_ei = func(x + eps * e_i)
-            f_x_ej = func(x + eps * e_j)
-            f_x = func(x)
-            hess[i, j] = hess[j, i] = (f_x_ei_ej - f_x_ei - f_x_ej + f_x) / eps**2
+
+    def shifted(*indices):
+        x_shift = np.array(x, dtype=float)
+        for i in indices:
+            x_shift[i] += eps
+        return x_shift
+
+    f_x = func(x)
+    f_x_ei = np.fromiter((func(shifted(i)) for i in range(n)), dtype=float, count=n)
+    iu, ju = np.triu_indices(n)
+    f_x_ei_ej = np.fromiter((func(shifted(i, j)) for i, j in zip(iu, ju)),
+                            dtype=float, count=len(iu))
+    hess = np.empty((n, n))
+    hess[iu, ju] = hess[ju, iu] = (f_x_ei_ej - f_x_ei[iu] - f_x_ei[ju] + f_x) / eps**2
     return hess
\ No newline at end of file
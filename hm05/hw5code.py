@@ -7,63 +7,54 @@ def find_best_split(feature_vector, target_vector):
     Находит лучший порог для разделения данных по критерию Джини.
 
     :param feature_vector: Вектор значений признака.
-    :param target_vector: Вектор классов объектов.
+    :param target_vector: Вектор классов объектов (любые метки, любое число классов).
 
     :return thresholds: Отсортированный вектор со всеми возможными порогами.
     :return ginis: Вектор со значениями критерия Джини для каждого порога.
     :return threshold_best: Оптимальный порог.
     :return gini_best: Оптимальное значение критерия Джини.
     """
-    # Уникальные значения и их сортировка
-    unique_values = np.unique(feature_vector)
+    # Если все объекты одного класса, любое разбиение даёт Gini = 0
+    if len(target_vector) == 0 or np.all(target_vector == target_vector[0]):
+        return [], [], None, None
 
-    # Параметры для хранения результатов
-    thresholds = []
-    ginis = []
+    # Сортировка объектов по значению признака
+    order = np.argsort(feature_vector, kind="stable")
+    feature_sorted = feature_vector[order]
+    target_sorted = target_vector[order]
 
-    # Если уникальных значений меньше 2, нет смысла искать пороги
-    if len(unique_values) < 2:
-        return thresholds, ginis, None, None
-
-    # Подсчет общего количества объектов и долей классов
-    total_count = len(target_vector)
-    class_counts = Counter(target_vector)
-
-    # Вычисление начальной энтропии
-    initial_gini = 1 - sum((count / total_count) ** 2 for count in class_counts.values())
-
-    # Проход по уникальным значениям для нахождения порогов
-    for i in range(len(unique_values) - 1):
-        threshold = (unique_values[i] + unique_values[i + 1]) / 2
-        left_mask = feature_vector < threshold
-        right_mask = ~left_mask
+    # Пороги ставятся только между различными соседними значениями
+    split_idx = np.nonzero(feature_sorted[:-1] != feature_sorted[1:])[0]
 
-        if np.any(left_mask) and np.any(right_mask):  # Проверяем, что обе подвыборки не пустые
-            left_counts = Counter(target_vector[left_mask])
-            right_counts = Counter(target_vector[right_mask])
+    # Если уникальных значений меньше 2, нет смысла искать пороги
+    if len(split_idx) == 0:
+        return [], [], None, None
 
-            left_size = left_mask.sum()
-            right_size = right_mask.sum()
+    thresholds = (feature_sorted[split_idx] + feature_sorted[split_idx + 1]) / 2
 
-            # Вычисление Gini для левой и правой подвыборок
-            left_gini = 1 - sum((count / left_size) ** 2 for count in left_counts.values())
-            right_gini = 1 - sum((count / right_size) ** 2 for count in right_counts.values())
+    # Размеры подвыборок и число объектов каждого класса в них
+    # через префиксные суммы one-hot кодировки классов
+    total_count = len(target_sorted)
+    left_size = split_idx + 1
+    right_size = total_count - left_size
+    classes, class_idx = np.unique(target_sorted, return_inverse=True)
+    class_cumsum = np.cumsum(np.eye(len(classes))[class_idx], axis=0)
+    left_counts = class_cumsum[split_idx]
+    right_counts = class_cumsum[-1] - left_counts
 
-            # Общий Gini для текущего порога
-            weighted_gini = (left_size / total_count) * left_gini + (right_size / total_count) * right_gini
+    # Вычисление Gini для левой и правой подвыборок
+    left_gini = 1 - ((left_counts / left_size[:, None]) ** 2).sum(axis=1)
+    right_gini = 1 - ((right_counts / right_size[:, None]) ** 2).sum(axis=1)
 
-            thresholds.append(threshold)
-            ginis.append(weighted_gini)
+    # Общий Gini для каждого порога
+    ginis = (left_size * left_gini + right_size * right_gini) / total_count
 
     # Находим лучший порог и соответствующее значение критерия Джини
-    if ginis:
-        gini_best_index = np.argmin(ginis)
-        threshold_best = thresholds[gini_best_index]
-        gini_best = ginis[gini_best_index]
-
-        return np.array(thresholds), np.array(ginis), threshold_best, gini_best
+    gini_best_index = np.argmin(ginis)
+    threshold_best = thresholds[gini_best_index]
+    gini_best = ginis[gini_best_index]
 
-    return [], [], None, None
+    return thresholds, ginis, threshold_best, gini_best
     # ╰( ͡° ͜ʖ ͡° )つ──☆*:・ﾟ
 
     pass
@@ -81,76 +72,132 @@ class DecisionTree(BaseEstimator):
         self._min_samples_leaf = min_samples_leaf
 
     def _fit_node(self, sub_X, sub_y, node):
+        """
+        Заполняет узел node и возвращает список (sub_X, sub_y, node)
+        для его дочерних узлов, которые ещё предстоит построить.
+        """
         # Проверка на терминальный узел
         if len(set(sub_y)) == 1:  # Все объекты одного класса
             node["type"] = "terminal"
             node["class"] = sub_y[0]
-            return
+            return []
 
         # Проверка на возможность разбить выборку
         feature_best, threshold_best, gini_best, split = None, None, None, None
+        categories_split = None
         for feature in range(sub_X.shape[1]):
             feature_type = self._feature_types[feature]
 
             if feature_type == "real":
                 feature_vector = sub_X[:, feature]
             elif feature_type == "categorical":
-                counts = Counter(sub_X[:, feature])
-                clicks = Counter(sub_X[sub_y == 1, feature])
-                ratio = {key: counts[key] / clicks[key] if key in clicks else 0 for key in counts}
-                sorted_categories = sorted(ratio.items(), key=lambda x: x[1])
-                categories_map = {cat: idx for idx, (cat, _) in enumerate(sorted_categories)}
-                feature_vector = np.array([categories_map[x] for x in sub_X[:, feature]])
+                # Доля объектов класса 1 в каждой категории
+                categories, inverse = np.unique(sub_X[:, feature], return_inverse=True)
+                counts = np.bincount(inverse)
+                clicks = np.bincount(inverse, weights=(sub_y == 1))
+                ratio = clicks / counts
+                # Категории нумеруются по возрастанию доли
+                order = np.argsort(ratio, kind="stable")
+                rank = np.empty_like(order)
+                rank[order] = np.arange(len(order))
+                feature_vector = rank[inverse]
             else:
                 raise ValueError("Unknown feature type")
 
-            thresholds, ginis = find_best_split(feature_vector, sub_y)
-            if gini_best is None or (ginis is not None and ginis.max() > gini_best):
-                gini_best = ginis.max()
+            _, _, threshold, gini = find_best_split(feature_vector, sub_y)
+            if gini is not None and (gini_best is None or gini < gini_best):
+                gini_best = gini
                 feature_best = feature
-                threshold_best = thresholds[np.argmax(ginis)]
+                threshold_best = threshold
                 split = feature_vector < threshold_best
+                if feature_type == "categorical":
+                    categories_split = categories[rank < threshold_best]
+                # Идеальное разбиение улучшить нельзя
+                if gini_best == 0:
+                    break
 
         # Если не удалось найти подходящее разбиение
         if gini_best is None:
             node["type"] = "terminal"
             node["class"] = Counter(sub_y).most_common(1)[0][0]
-            return
+            return []
 
-        # Создание узла и рекурсивный вызов для дочерних узлов
+        # Создание узла, дочерние узлы строятся в fit
         node["type"] = "nonterminal"
         node["feature_split"] = feature_best
-        node["threshold"] = threshold_best
+        if self._feature_types[feature_best] == "real":
+            node["threshold"] = threshold_best
+        else:
+            node["categories_split"] = categories_split
         node["left_child"], node["right_child"] = {}, {}
 
-        self._fit_node(sub_X[split], sub_y[split], node["left_child"])
-        self._fit_node(sub_X[~split], sub_y[~split], node["right_child"])
-
-    def _predict_node(self, x, node):
-        if node["type"] == "terminal":
-            return node["class"]
-
-        feature_value = x[node["feature_split"]]
-
-        if self._feature_types[node["feature_split"]] == "real":
-            if feature_value < node["threshold"]:
-                return self._predict_node(x, node["left_child"])
+        return [(sub_X[split], sub_y[split], node["left_child"]),
+                (sub_X[~split], sub_y[~split], node["right_child"])]
+
+    def _flatten_tree(self):
+        """
+        Переводит дерево из вложенных словарей в массивы по узлам
+        (индекс узла -> признак, порог, потомки, класс) для предсказания.
+        """
+        nodes = [self._tree]
+        feature, threshold, left, right, is_leaf, classes, categories = [], [], [], [], [], [], []
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            if node["type"] == "terminal":
+                feature.append(0)
+                threshold.append(np.nan)
+                left.append(-1)
+                right.append(-1)
+                is_leaf.append(True)
+                classes.append(node["class"])
+                categories.append(None)
             else:
-                return self._predict_node(x, node["right_child"])
-        elif self._feature_types[node["feature_split"]] == "categorical":
-            category_index = int(feature_value)
-            if category_index < node["threshold"]:
-                return self._predict_node(x, node["left_child"])
-            else:
-                return self._predict_node(x, node["right_child"])
-        else:
-            raise ValueError("Unknown feature type")
+                feature.append(node["feature_split"])
+                threshold.append(node.get("threshold", np.nan))
+                left.append(len(nodes))
+                right.append(len(nodes) + 1)
+                is_leaf.append(False)
+                classes.append(None)
+                categories.append(node.get("categories_split"))
+                nodes.append(node["left_child"])
+                nodes.append(node["right_child"])
+            i += 1
+
+        self._node_feature = np.array(feature)
+        self._node_threshold = np.array(threshold, dtype=float)
+        self._node_left = np.array(left)
+        self._node_right = np.array(right)
+        self._node_is_leaf = np.array(is_leaf)
+        # Внутренним узлам класс не нужен, заполняем его классом любого листа
+        leaf_class = classes[is_leaf.index(True)]
+        self._node_class = np.array([leaf_class if c is None else c for c in classes])
+        self._node_categories = categories
+        self._node_is_categorical = np.array([c is not None for c in categories])
 
     def fit(self, X, y):
-        self._fit_node(X, y, self._tree)
+        # Каждый fit строит дерево заново
+        self._tree = {}
+        # Обход с явным стеком вместо рекурсии
+        stack = [(X, y, self._tree)]
+        while stack:
+            stack.extend(self._fit_node(*stack.pop()))
+        self._flatten_tree()
 
     def predict(self, X):
-        predicted = []
-        for x in X:
-            predicted.append(self._predict_node(x, self._tree))
-        return np.array(predicted)
+        X = np.asarray(X)
+        # Все объекты спускаются по дереву одновременно, по уровню за шаг
+        node_id = np.zeros(X.shape[0], dtype=int)
+        # Храним только объекты, ещё не дошедшие до листа
+        rows = np.nonzero(~self._node_is_leaf[node_id])[0]
+        while len(rows):
+            nodes = node_id[rows]
+            values = X[rows, self._node_feature[nodes]]
+            go_left = values < self._node_threshold[nodes]
+            for node in np.unique(nodes[self._node_is_categorical[nodes]]):
+                mask = nodes == node
+                go_left[mask] = np.isin(values[mask], self._node_categories[node])
+            nodes = np.where(go_left, self._node_left[nodes], self._node_right[nodes])
+            node_id[rows] = nodes
+            rows = rows[~self._node_is_leaf[nodes]]
+        return self._node_class[node_id]